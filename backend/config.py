@@ -1,28 +1,33 @@
 import os
+from dataclasses import dataclass
 from typing import Optional
 import dotenv
 
 dotenv.load_dotenv()
 
+def _default_chroma_dir() -> str:
+    if os.name == "nt":  # local Windows
+        return os.path.join(os.getcwd(), "chroma_db")
+    # Use /tmp on Render (writable)
+    return os.getenv("CHROMA_PERSIST_DIRECTORY", "/tmp/chroma_db")
+
+@dataclass(frozen=True, slots=True)
 class Config:
+    """Immutable settings, resolved from the environment once at import"""
+
     # === API Keys ===
-    GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY")
+    GEMINI_API_KEY: Optional[str] = os.getenv("GEMINI_API_KEY")
     COHERE_API_KEY: Optional[str] = os.getenv("COHERE_API_KEY")
-    
-# config.py (important lines)
-    if os.name == "nt":  # local Windows
-        CHROMA_PERSIST_DIRECTORY = os.path.join(os.getcwd(), "chroma_db")
-    else:
-        # Use /tmp on Render (writable)
-        CHROMA_PERSIST_DIRECTORY = os.getenv("CHROMA_PERSIST_DIRECTORY", "/tmp/chroma_db")
 
-    UPLOAD_DIRECTORY = os.getenv("UPLOAD_DIR", "/tmp/uploads")
+    CHROMA_PERSIST_DIRECTORY: str = _default_chroma_dir()
+    UPLOAD_DIRECTORY: str = os.getenv("UPLOAD_DIR", "/tmp/uploads")
 
-    
     CHROMA_COLLECTION_NAME: str = "documents"
 
     # === Embeddings ===
     EMBEDDING_MODEL: str = "embed-english-v3.0"
+    # Lives outside CHROMA_PERSIST_DIRECTORY so it survives the startup reset
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "/tmp/embedding_cache.db")
 
     # === File Settings ===
     MAX_FILE_SIZE: int = 50 * 1024 * 1024  # 50MB
@@ -31,12 +36,19 @@ class Config:
     HOST: str = "0.0.0.0"
     PORT: int = int(os.getenv("PORT", 8000))
 
-    @classmethod
-    def validate(cls):
+    # === LLM Settings ===
+    LLM_TIMEOUT: int = int(os.getenv("LLM_TIMEOUT", 60))  # seconds
+
+    # === Session Storage ===
+    # When set, conversation history lives in Redis (shared across workers);
+    # otherwise an in-process store is used
+    REDIS_URL: Optional[str] = os.getenv("REDIS_URL")
+
+    def validate(self):
         """Ensure all required environment variables are present."""
-        if not cls.GEMINI_API_KEY:
+        if not self.GEMINI_API_KEY:
             raise ValueError("❌ GEMINI_API_KEY environment variable is required.")
-        if not cls.COHERE_API_KEY:
+        if not self.COHERE_API_KEY:
             raise ValueError("❌ COHERE_API_KEY environment variable is required for embeddings.")
 
 config = Config()
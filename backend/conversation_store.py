@@ -0,0 +1,137 @@
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_RECENT_TURNS = 3
+
+# Bounds so idle/abandoned sessions are reclaimed on long-running deployments
+_MAX_SESSIONS = 1000
+_SESSION_TTL_SECONDS = 3600
+
+
+class InMemoryConversationStore:
+    """Process-local session store (default); state is lost on restart"""
+
+    def __init__(self):
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, session_id: str) -> Dict[str, Any]:
+        """Return {'summary', 'recent'} for a session, empty if unknown"""
+        session = self._sessions.get(session_id)
+        if session is None:
+            return {'summary': '', 'recent': []}
+        return {'summary': session['summary'], 'recent': list(session['recent'])}
+
+    def append_turn(self, session_id: str, question: str, answer: str) -> Optional[Dict[str, str]]:
+        """Append a turn; return the turn evicted from the recent window, if any"""
+        session = self._sessions.setdefault(
+            session_id, {'summary': '', 'recent': deque(maxlen=_RECENT_TURNS)}
+        )
+        session['last_used'] = time.time()
+        self._evict_stale()
+        recent = session['recent']
+        evicted = recent[0] if len(recent) == recent.maxlen else None
+        recent.append({'user': question, 'assistant': answer})
+        return evicted
+
+    def set_summary(self, session_id: str, summary: str):
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session['summary'] = summary
+
+    def delete(self, session_id: str):
+        self._sessions.pop(session_id, None)
+
+    def _evict_stale(self):
+        """Drop idle sessions so long uptimes don't leak memory"""
+        now = time.time()
+        expired = [
+            sid for sid, session in self._sessions.items()
+            if now - session.get('last_used', now) > _SESSION_TTL_SECONDS
+        ]
+        for sid in expired:
+            del self._sessions[sid]
+
+        while len(self._sessions) > _MAX_SESSIONS:
+            oldest = min(
+                self._sessions,
+                key=lambda sid: self._sessions[sid].get('last_used', 0.0)
+            )
+            del self._sessions[oldest]
+
+
+class RedisConversationStore:
+    """Redis-backed session store: survives restarts and is shared across workers
+
+    Each session is two keys with a TTL: a list of recent turns (one JSON
+    entry per turn) and a plain-string summary. Keeping them separate and
+    using list operations means every update is a single atomic Redis
+    transaction — no read-modify-write of a shared blob, so concurrent
+    workers can't lose turns or have a late summary clobber newer ones.
+    Idle-session eviction is handled by Redis itself via the TTLs.
+    """
+
+    def __init__(self, url: str):
+        import redis
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._redis.ping()
+
+    @staticmethod
+    def _recent_key(session_id: str) -> str:
+        return f"conversation:{session_id}:recent"
+
+    @staticmethod
+    def _summary_key(session_id: str) -> str:
+        return f"conversation:{session_id}:summary"
+
+    def get(self, session_id: str) -> Dict[str, Any]:
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.get(self._summary_key(session_id))
+        pipe.lrange(self._recent_key(session_id), 0, -1)
+        summary, raw_recent = pipe.execute()
+        return {
+            'summary': summary or '',
+            'recent': [json.loads(turn) for turn in raw_recent]
+        }
+
+    def append_turn(self, session_id: str, question: str, answer: str) -> Optional[Dict[str, str]]:
+        recent_key = self._recent_key(session_id)
+        # RPUSH + LTRIM inside one MULTI keeps the window bounded without
+        # ever reading the list back; the LINDEX between them captures the
+        # turn about to fall off
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.rpush(recent_key, json.dumps({'user': question, 'assistant': answer}))
+        pipe.lindex(recent_key, 0)
+        pipe.ltrim(recent_key, -_RECENT_TURNS, -1)
+        pipe.expire(recent_key, _SESSION_TTL_SECONDS)
+        pipe.expire(self._summary_key(session_id), _SESSION_TTL_SECONDS)
+        length, oldest = pipe.execute()[:2]
+        if length > _RECENT_TURNS and oldest is not None:
+            return json.loads(oldest)
+        return None
+
+    def set_summary(self, session_id: str, summary: str):
+        # Single SET on a dedicated key: can't race with append_turn, and
+        # never resurrects a session whose turns have already expired
+        if not self._redis.exists(self._recent_key(session_id)):
+            return
+        self._redis.set(self._summary_key(session_id), summary, ex=_SESSION_TTL_SECONDS)
+
+    def delete(self, session_id: str):
+        self._redis.delete(self._recent_key(session_id), self._summary_key(session_id))
+
+
+def create_conversation_store(redis_url: Optional[str]):
+    """Return a Redis store when REDIS_URL is set and reachable, else in-memory"""
+    if redis_url:
+        try:
+            store = RedisConversationStore(redis_url)
+            logger.info("Using Redis conversation store")
+            return store
+        except Exception as e:
+            logger.warning(f"Redis unavailable ({str(e)}), falling back to in-memory store")
+    return InMemoryConversationStore()
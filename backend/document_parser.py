@@ -1,77 +1,145 @@
+import json
+import multiprocessing
 import os
 import logging
-from typing import Dict, Any
-import PyPDF2
-from docx import Document
-from pptx import Presentation
-import pandas as pd
-import markdown
-import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from typing import Dict, Any, Optional
+
+# Parser libraries (pymupdf, python-docx, python-pptx, pandas, markdown)
+# are imported lazily inside each handler: together they add seconds to
+# cold start, and most deployments only ever see a subset of file types.
 
 logger = logging.getLogger(__name__)
 
+# Below this page count, process-pool spawn overhead outweighs the win
+_PARALLEL_PDF_MIN_PAGES = 64
+
+# One shared worker pool for large-PDF extraction, created on first use.
+# The spawn start method matters: forking this multi-threaded server
+# process (event loop, parse/embed threads, logging locks) can deadlock
+# the children.
+_PDF_POOL_WORKERS = min(os.cpu_count() or 2, 8)
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    if _pdf_pool is None:
+        with _pdf_pool_lock:
+            if _pdf_pool is None:
+                _pdf_pool = ProcessPoolExecutor(
+                    max_workers=_PDF_POOL_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _pdf_pool
+
+class _TextExtractor(HTMLParser):
+    """Collect text nodes from rendered markdown in a single pass
+
+    Unlike a tag-stripping regex this also decodes entities (&amp; etc.)
+    and never backtracks on malformed markup.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts = []
+
+    def handle_data(self, data):
+        self._parts.append(data)
+
+    def text(self) -> str:
+        return "".join(self._parts)
+
+def _strip_tags(html: str) -> str:
+    """Extract plain text from an HTML fragment"""
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return extractor.text()
+
+def _extract_pdf_page_range(file_path: str, start: int, stop: int) -> str:
+    """Extract a contiguous page range (runs in a worker process)"""
+    import pymupdf
+
+    with pymupdf.open(file_path) as doc:
+        return "".join(
+            f"\n--- Page {page_num + 1} ---\n{doc[page_num].get_text()}"
+            for page_num in range(start, stop)
+        )
+
 class DocumentProcessor:
     """Process different document types"""
     
     def process_file(self, file_path: str) -> Dict[str, Any]:
         """Process a file based on its extension"""
-        ext = os.path.splitext(file_path)[1].lower()
-        
-        processors = {
-            '.pdf': self._process_pdf,
-            '.docx': self._process_docx,
-            '.pptx': self._process_pptx,
-            '.csv': self._process_csv,
-            '.txt': self._process_txt,
-            '.md': self._process_md,
-        }
-        
-        processor = processors.get(ext)
+        ext = os.path.splitext(file_path)[1].lower().lstrip('.')
+
+        processor = self._PROCESSORS.get(ext)
         if not processor:
             raise ValueError(f"Unsupported file type: {ext}")
-        
-        return processor(file_path)
+
+        return processor(self, file_path)
     
     def _process_pdf(self, file_path: str) -> Dict[str, Any]:
         """Process PDF file"""
+        import pymupdf
+
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text_content = ""
-                
-                for page_num, page in enumerate(pdf_reader.pages):
-                    page_text = page.extract_text()
-                    text_content += f"\n--- Page {page_num + 1} ---\n{page_text}"
-                
-                return {
-                    "content": text_content,
-                    "metadata": {
-                        "num_pages": len(pdf_reader.pages),
-                        "file_type": "pdf",
-                        "file_path": file_path
-                    }
+            with pymupdf.open(file_path) as doc:
+                num_pages = doc.page_count
+                if num_pages < _PARALLEL_PDF_MIN_PAGES:
+                    parts = [
+                        f"\n--- Page {page_num + 1} ---\n{page.get_text()}"
+                        for page_num, page in enumerate(doc)
+                    ]
+                else:
+                    parts = None
+
+            if parts is None:
+                # Large PDF: split page ranges across worker processes, each
+                # opening its own document handle
+                step = -(-num_pages // _PDF_POOL_WORKERS)  # ceil division
+                ranges = [(i, min(i + step, num_pages)) for i in range(0, num_pages, step)]
+                parts = list(_get_pdf_pool().map(
+                    _extract_pdf_page_range,
+                    [file_path] * len(ranges),
+                    [start for start, _ in ranges],
+                    [stop for _, stop in ranges]
+                ))
+
+            return {
+                "content": "".join(parts),
+                "metadata": {
+                    "num_pages": num_pages,
+                    "file_type": "pdf",
+                    "file_path": file_path
                 }
+            }
         except Exception as e:
             logger.error(f"Error parsing PDF {file_path}: {str(e)}")
             raise
     
     def _process_docx(self, file_path: str) -> Dict[str, Any]:
         """Process DOCX file"""
+        from docx import Document
+
         try:
             doc = Document(file_path)
-            text_content = ""
-            
+            parts = []
+
             for paragraph in doc.paragraphs:
                 if paragraph.text.strip():
-                    text_content += paragraph.text + "\n"
-            
+                    parts.append(paragraph.text + "\n")
+
             for table in doc.tables:
                 for row in table.rows:
                     row_text = " | ".join([cell.text for cell in row.cells])
-                    text_content += row_text + "\n"
-            
+                    parts.append(row_text + "\n")
+
             return {
-                "content": text_content,
+                "content": "".join(parts),
                 "metadata": {
                     "num_paragraphs": len(doc.paragraphs),
                     "num_tables": len(doc.tables),
@@ -85,25 +153,27 @@ class DocumentProcessor:
     
     def _process_pptx(self, file_path: str) -> Dict[str, Any]:
         """Process PPTX file"""
+        from pptx import Presentation
+
         try:
             prs = Presentation(file_path)
-            text_content = ""
-            
+            parts = []
+
             for slide_num, slide in enumerate(prs.slides):
-                text_content += f"\n--- Slide {slide_num + 1} ---\n"
-                
+                parts.append(f"\n--- Slide {slide_num + 1} ---\n")
+
                 for shape in slide.shapes:
                     if hasattr(shape, "text") and shape.text.strip():
-                        text_content += shape.text + "\n"
-                    
+                        parts.append(shape.text + "\n")
+
                     if shape.has_table:
                         table = shape.table
                         for row in table.rows:
                             row_text = " | ".join([cell.text for cell in row.cells])
-                            text_content += row_text + "\n"
-            
+                            parts.append(row_text + "\n")
+
             return {
-                "content": text_content,
+                "content": "".join(parts),
                 "metadata": {
                     "num_slides": len(prs.slides),
                     "file_type": "pptx",
@@ -116,27 +186,38 @@ class DocumentProcessor:
     
     def _process_csv(self, file_path: str) -> Dict[str, Any]:
         """Process CSV file"""
+        import pandas as pd
+
         try:
-            df = pd.read_csv(file_path)
-            
-            text_content = f"CSV Data Summary:\n"
-            text_content += f"Columns: {', '.join(df.columns.tolist())}\n"
-            text_content += f"Number of rows: {len(df)}\n\n"
-            
-            text_content += "Column Information:\n"
+            try:
+                # Arrow's multi-threaded reader parses large CSVs several
+                # times faster than the default C engine
+                df = pd.read_csv(file_path, engine='pyarrow')
+            except (ImportError, ValueError) as e:
+                logger.warning(f"pyarrow engine unavailable for {file_path}, falling back: {str(e)}")
+                df = pd.read_csv(file_path)
+
+            parts = [
+                "CSV Data Summary:\n",
+                f"Columns: {', '.join(df.columns.tolist())}\n",
+                f"Number of rows: {len(df)}\n\n",
+                "Column Information:\n"
+            ]
             for col in df.columns:
-                text_content += f"- {col}: {df[col].dtype}\n"
-            
-            text_content += "\nData Preview:\n"
-            text_content += df.head(10).to_string(index=False)
-            
+                parts.append(f"- {col}: {df[col].dtype}\n")
+
+            # JSON round trips are an order of magnitude cheaper than
+            # pandas' column-aligning to_string, and chunk/embed just as well
+            parts.append("\nData Preview:\n")
+            parts.append(json.dumps(df.head(10).astype(str).to_dict(orient='records')))
+
             numeric_cols = df.select_dtypes(include=['number']).columns
             if len(numeric_cols) > 0:
-                text_content += "\n\nNumerical Statistics:\n"
-                text_content += df[numeric_cols].describe().to_string()
-            
+                parts.append("\n\nNumerical Statistics:\n")
+                parts.append(json.dumps(df[numeric_cols].describe().round(4).to_dict()))
+
             return {
-                "content": text_content,
+                "content": "".join(parts),
                 "metadata": {
                     "num_rows": len(df),
                     "num_columns": len(df.columns),
@@ -170,13 +251,15 @@ class DocumentProcessor:
     
     def _process_md(self, file_path: str) -> Dict[str, Any]:
         """Process Markdown file"""
+        import markdown
+
         try:
             with open(file_path, 'r', encoding='utf-8') as file:
                 content = file.read()
             
             # Convert markdown to plain text
             html = markdown.markdown(content)
-            plain_text = re.sub('<[^<]+?>', '', html)
+            plain_text = _strip_tags(html)
             
             return {
                 "content": plain_text,
@@ -189,4 +272,16 @@ class DocumentProcessor:
             }
         except Exception as e:
             logger.error(f"Error parsing Markdown {file_path}: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    # Dispatch table built once at class-definition time; keys are
+    # normalized extensions without the leading dot
+    _PROCESSORS = {
+        'pdf': _process_pdf,
+        'docx': _process_docx,
+        'pptx': _process_pptx,
+        'csv': _process_csv,
+        'txt': _process_txt,
+        'md': _process_md,
+        'markdown': _process_md,
+    }
\ No newline at end of file
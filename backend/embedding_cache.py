@@ -0,0 +1,66 @@
+import logging
+import os
+import sqlite3
+import threading
+from array import array
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """Disk-backed cache of chunk embeddings keyed by content hash + model"""
+
+    def __init__(self, cache_path: str):
+        parent = os.path.dirname(cache_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "  hash TEXT NOT NULL,"
+            "  model TEXT NOT NULL,"
+            "  embedding BLOB NOT NULL,"
+            "  PRIMARY KEY (hash, model)"
+            ")"
+        )
+        self._conn.commit()
+        logger.info(f"Embedding cache ready at: {cache_path}")
+
+    def get_many(self, hashes: List[str], model: str) -> Dict[str, List[float]]:
+        """Return cached embeddings for the given content hashes"""
+        if not hashes:
+            return {}
+
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            placeholders = ",".join("?" * len(hashes))
+            rows = self._conn.execute(
+                f"SELECT hash, embedding FROM embeddings "
+                f"WHERE model = ? AND hash IN ({placeholders})",
+                [model, *hashes]
+            ).fetchall()
+
+        for chunk_hash, blob in rows:
+            vec = array('f')
+            vec.frombytes(blob)
+            found[chunk_hash] = vec.tolist()
+
+        return found
+
+    def put_many(self, items: Dict[str, List[float]], model: str):
+        """Store embeddings keyed by content hash"""
+        if not items:
+            return
+
+        rows = [
+            (chunk_hash, model, array('f', embedding).tobytes())
+            for chunk_hash, embedding in items.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (hash, model, embedding) VALUES (?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
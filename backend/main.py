@@ -1,12 +1,27 @@
+import asyncio
+import hashlib
+import json
 import logging
 import os
+import shutil
+import threading
 import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import List, Optional, Dict, Any
+import aiofiles
+import async_timeout
+import numpy as np
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 import google.generativeai as genai
 from config import config
+from conversation_store import create_conversation_store
 from document_parser import DocumentProcessor
 from vector_store import VectorStore
 
@@ -17,8 +32,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize services on startup; warm the LLM channel in the background"""
+    initialize_services()
+    warmup = asyncio.create_task(_warm_gemini())
+    yield
+    warmup.cancel()
+    _PARSE_POOL.shutdown(wait=False, cancel_futures=True)
+
 # Initialize FastAPI app
-app = FastAPI(title="Simple RAG Chatbot", version="1.0.0")
+app = FastAPI(title="Simple RAG Chatbot", version="1.0.0",
+              default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # CORS configuration
 app.add_middleware(
@@ -33,12 +58,124 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# SSE endpoints must stay uncompressed: Starlette's gzip responder only
+# flushes the compressor at stream close, so compressed event streams
+# arrive in bursts instead of per-delta
+_UNCOMPRESSED_PATHS = frozenset({"/ask/stream"})
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that passes event-stream endpoints through untouched"""
+
+    async def __call__(self, scope, receive, send):
+        if scope.get("type") == "http" and scope.get("path") in _UNCOMPRESSED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# Compress larger JSON bodies (long answers, conversation history); level 5
+# trades a little ratio for much lower CPU than the default
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Global variables
 vector_store: Optional[VectorStore] = None
 doc_processor: Optional[DocumentProcessor] = None
-conversation_history: Dict[str, List[Dict[str, str]]] = {}
+# Summary-buffer memory: per session a running summary of older turns plus
+# the last few raw turns, so prompt size stays flat as conversations grow.
+# Backed by Redis when REDIS_URL is set, else an in-process store.
+conversation_store = create_conversation_store(config.REDIS_URL)
 gemini_model = None
 
+_SUMMARY_MAX_CHARS = 800
+
+# Pool for CPU/IO-bound document parsing so uploads don't block the event loop
+_PARSE_POOL = ThreadPoolExecutor(
+    max_workers=min(8, os.cpu_count() or 4),
+    thread_name_prefix="parse"
+)
+
+# Cap concurrent file ingests across all in-flight upload requests so a
+# burst of large uploads can't saturate the pool and starve /ask searches
+_INGEST_CONCURRENCY = 4
+_ingest_semaphore = asyncio.Semaphore(_INGEST_CONCURRENCY)
+
+# Per-upload ingestion status, polled via /upload/status/{upload_id};
+# bounded so finished entries age out
+_upload_status: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_UPLOAD_STATUS_MAX = 200
+
+# The event loop keeps only weak references to tasks, so fire-and-forget
+# work needs a strong reference until it finishes or it can be collected
+# mid-flight and die silently
+_background_tasks: "set[asyncio.Task]" = set()
+
+def _spawn_task(coro) -> asyncio.Task:
+    """Schedule a background coroutine, keeping it referenced until done"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+# Exact-match answer cache (LRU). The key includes session_id and history
+# length so a hit never bypasses personalized conversation context.
+_ANSWER_CACHE: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_ANSWER_CACHE_MAX = 256
+
+# Semantic tier behind the exact cache: paraphrased repeats of a question
+# hit on embedding cosine similarity. Entries are scoped to the same
+# conversation context and index generation, so a hit is always safe.
+_SEMANTIC_ANSWER_CACHE: List[Dict[str, Any]] = []
+_SEMANTIC_ANSWER_MAX = 128
+_SEMANTIC_ANSWER_THRESHOLD = 0.97
+
+# Bumped whenever new documents are indexed; stale answers never survive
+# an upload
+_index_generation = 0
+
+_answer_cache_stats = {'exact_hits': 0, 'semantic_hits': 0, 'misses': 0}
+
+# Upload types we can parse; frozen at import so validation is one set lookup
+_ALLOWED_EXTENSIONS = frozenset({'.pdf', '.docx', '.pptx', '.csv', '.txt', '.md'})
+
+# Content digests of everything indexed this run; re-uploads of identical
+# bytes are dropped before parsing. Entries are added only after a batch
+# is actually indexed, so a failed ingest never blocks a retry. Uploads
+# are wiped on restart, so the map starting empty matches the index state.
+_seen_digests: Dict[str, str] = {}
+
+def _answer_cache_key(question: str, session_id: str, summary: str, recent_len: int) -> str:
+    raw = f"{question.strip()}|{session_id}|{recent_len}|{summary}|{_index_generation}"
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+def _context_key(session_id: str, summary: str, recent_len: int) -> bytes:
+    raw = f"{session_id}|{recent_len}|{summary}"
+    return hashlib.blake2b(raw.encode(), digest_size=16).digest()
+
+def _semantic_answer_get(question_vec: np.ndarray, session_id: str,
+                         summary: str, recent_len: int) -> Optional[Dict[str, Any]]:
+    ctx = _context_key(session_id, summary, recent_len)
+    best = None
+    for entry in _SEMANTIC_ANSWER_CACHE:
+        if entry['generation'] != _index_generation or entry['context'] != ctx:
+            continue
+        similarity = float(np.dot(entry['embedding'], question_vec))
+        if similarity >= _SEMANTIC_ANSWER_THRESHOLD and (best is None or similarity > best[0]):
+            best = (similarity, entry)
+    if best:
+        logger.info(f"Semantic answer cache hit (similarity={best[0]:.3f})")
+        return best[1]['payload']
+    return None
+
+def _semantic_answer_put(question_vec: np.ndarray, session_id: str,
+                         summary: str, recent_len: int, payload: Dict[str, Any]):
+    _SEMANTIC_ANSWER_CACHE.append({
+        'embedding': question_vec,
+        'context': _context_key(session_id, summary, recent_len),
+        'generation': _index_generation,
+        'payload': payload
+    })
+    if len(_SEMANTIC_ANSWER_CACHE) > _SEMANTIC_ANSWER_MAX:
+        _SEMANTIC_ANSWER_CACHE.pop(0)
+
 print("Writable dirs check:", os.access("/tmp", os.W_OK))
 print("Writable dirs check:", os.access(config.UPLOAD_DIRECTORY, os.W_OK))
 
@@ -56,10 +193,32 @@ class QuestionResponse(BaseModel):
 
 class UploadResponse(BaseModel):
     success: bool
+    upload_id: Optional[str] = None
     processed_files: List[str] = []
     message: Optional[str] = None
     error: Optional[str] = None
 
+def _clear_directory(path: str):
+    """Reset a directory without blocking startup on the deletion
+
+    Rename is atomic and instant even for large trees; the actual rmtree
+    runs on a daemon thread while the app keeps booting.
+    """
+    if not os.path.exists(path):
+        return
+    trash_path = f"{path}.old-{uuid.uuid4().hex[:8]}"
+    try:
+        os.rename(path, trash_path)
+    except OSError:
+        shutil.rmtree(path, ignore_errors=True)
+        return
+    threading.Thread(
+        target=shutil.rmtree,
+        args=(trash_path,),
+        kwargs={'ignore_errors': True},
+        daemon=True
+    ).start()
+
 def initialize_services():
     """Initialize services on startup (auto-clears ChromaDB + uploads each restart)"""
     global vector_store, doc_processor, gemini_model
@@ -70,16 +229,13 @@ def initialize_services():
         # Validate config
         config.validate()
 
-        # Reset persisted data for a clean slate ---
-        if os.path.exists(config.CHROMA_PERSIST_DIRECTORY):
-            import shutil
-            shutil.rmtree(config.CHROMA_PERSIST_DIRECTORY, ignore_errors=True)
-            logger.warning(f"Cleared existing ChromaDB data at: {config.CHROMA_PERSIST_DIRECTORY}")
+        # Reset persisted data for a clean slate; deletion happens in the
+        # background so cold start doesn't wait on it
+        _clear_directory(config.CHROMA_PERSIST_DIRECTORY)
+        logger.warning(f"Cleared existing ChromaDB data at: {config.CHROMA_PERSIST_DIRECTORY}")
 
-        if os.path.exists(config.UPLOAD_DIRECTORY):
-            import shutil
-            shutil.rmtree(config.UPLOAD_DIRECTORY, ignore_errors=True)
-            logger.warning(f"Cleared existing uploaded files at: {config.UPLOAD_DIRECTORY}")
+        _clear_directory(config.UPLOAD_DIRECTORY)
+        logger.warning(f"Cleared existing uploaded files at: {config.UPLOAD_DIRECTORY}")
 
         # Recreate clean directories
         os.makedirs(config.CHROMA_PERSIST_DIRECTORY, exist_ok=True)
@@ -93,7 +249,8 @@ def initialize_services():
         vector_store = VectorStore(
             persist_directory=config.CHROMA_PERSIST_DIRECTORY,
             collection_name=config.CHROMA_COLLECTION_NAME,
-            embedding_model=config.EMBEDDING_MODEL
+            embedding_model=config.EMBEDDING_MODEL,
+            embedding_cache_path=config.EMBEDDING_CACHE_PATH
         )
 
         # --- 📄 Initialize Document Processor ---
@@ -105,10 +262,15 @@ def initialize_services():
         logger.error(f"Failed to initialize services: {str(e)}")
         raise
 
-@app.on_event("startup")
-async def startup_event():
-    """Run initialization on startup"""
-    initialize_services()
+async def _warm_gemini():
+    """Open the Gemini channel ahead of the first user request"""
+    try:
+        await gemini_model.generate_content_async(
+            "ping", generation_config={'max_output_tokens': 1}
+        )
+        logger.info("Gemini connection warmed")
+    except Exception as e:
+        logger.warning(f"Gemini warmup failed (non-fatal): {str(e)}")
 
 @app.get("/")
 def root():
@@ -122,50 +284,169 @@ def health_check():
             "vector_store": vector_store is not None,
             "doc_processor": doc_processor is not None,
             "gemini": gemini_model is not None
+        },
+        "answer_cache": {
+            **_answer_cache_stats,
+            "exact_entries": len(_ANSWER_CACHE),
+            "semantic_entries": len(_SEMANTIC_ANSWER_CACHE),
+            "index_generation": _index_generation
         }
     }
 
+# Cap on total context tokens sent to Gemini; prompt size is the primary
+# LLM latency driver, and tokens track it far better than characters
+_CONTEXT_MAX_TOKENS = 3000
+
+@lru_cache(maxsize=1)
+def _context_encoder():
+    """Lazy tokenizer load; None if tiktoken is unavailable"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable, falling back to char estimate: {str(e)}")
+        return None
+
+def _count_tokens(text: str) -> int:
+    encoder = _context_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
+    # ~4 chars per token is close enough for budgeting English text
+    return len(text) // 4
+
+def _select_context_chunks(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop near-duplicate chunks and cap total context size in tokens"""
+    selected = []
+    seen_prefixes = set()
+    total_tokens = 0
+    for result in results:
+        content = result['content']
+        prefix = hashlib.blake2b(content[:256].encode(), digest_size=16).digest()
+        if prefix in seen_prefixes:
+            continue
+        tokens = _count_tokens(content)
+        if selected and total_tokens + tokens > _CONTEXT_MAX_TOKENS:
+            break
+        seen_prefixes.add(prefix)
+        selected.append(result)
+        total_tokens += tokens
+    return selected
+
+@lru_cache(maxsize=64)
+def _format_source(filename: str, file_type: str) -> str:
+    """Format a source label; cached since the same files repeat across queries"""
+    return "%s (%s)" % (filename, file_type)
+
+# Shared fallback so missing metadata doesn't allocate a dict per result
+_EMPTY_METADATA: Dict[str, str] = {}
+
+def _extract_sources(results: List[Dict[str, Any]]) -> List[str]:
+    """Build ordered, deduplicated source labels from result metadata"""
+    basename = os.path.basename  # local binding, called once per result
+    metadatas = [r.get('metadata', _EMPTY_METADATA) for r in results]
+    filenames = [basename(m.get('file_path', 'Unknown')) for m in metadatas]
+    file_types = [m.get('file_type', 'Unknown') for m in metadatas]
+    # dict.fromkeys dedupes in O(n) while preserving first-seen order
+    return list(dict.fromkeys(
+        _format_source(filename, file_type)
+        for filename, file_type in zip(filenames, file_types)
+    ))
+
+async def _ingest_one(file_path: str) -> Dict[str, Any]:
+    """Parse a single saved file, bounded by the global ingest semaphore
+
+    Indexing is done once for the whole batch (add_documents_bulk) so the
+    embedding call and Chroma add are amortized across all files.
+    """
+    async with _ingest_semaphore:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_PARSE_POOL, doc_processor.process_file, file_path)
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Retrieval cache statistics"""
+    if vector_store is None:
+        return {"error": "Vector store not initialized"}
+    return vector_store.get_cache_stats()
+
 @app.post("/upload", response_model=UploadResponse)
 async def upload_documents(files: List[UploadFile] = File(...)):
     """Upload and process documents"""
     logger.info(f"Received upload request with {len(files)} files")
     
     try:
-        supported_extensions = {'.pdf', '.docx', '.pptx', '.csv', '.txt', '.md'}
         file_paths = []
-        processed_files = []
+        skipped_files = []
+        digests: Dict[str, str] = {}  # saved path -> content digest
 
         # Save files
         for file in files:
             ext = os.path.splitext(file.filename)[1].lower()
-            if ext not in supported_extensions:
+            if ext not in _ALLOWED_EXTENSIONS:
                 raise HTTPException(status_code=400, detail=f"Unsupported file type: {ext}")
 
             file_id = str(uuid.uuid4())
             file_path = os.path.join(config.UPLOAD_DIRECTORY, f"{file_id}_{file.filename}")
-            
-            content = await file.read()
-            with open(file_path, "wb") as f:
-                f.write(content)
-            
-            file_paths.append(file_path)
-            logger.info(f"Saved file: {file.filename}")
 
-        # Process documents
-        for file_path in file_paths:
+            # Stream to disk in 1MB chunks; abort as soon as the size cap
+            # is exceeded instead of buffering the whole upload in RAM.
+            # The content hash rides along on the same pass over the bytes.
+            file_size = 0
+            hasher = hashlib.sha256()
             try:
-                document = doc_processor.process_file(file_path)
-                vector_store.add_document(document)
-                processed_files.append(os.path.basename(file_path))
-                logger.info(f"Processed and indexed: {os.path.basename(file_path)}")
-            except Exception as e:
-                logger.error(f"Error processing {file_path}: {str(e)}")
+                async with aiofiles.open(file_path, "wb") as out:
+                    while chunk := await file.read(1 << 20):
+                        file_size += len(chunk)
+                        if file_size > config.MAX_FILE_SIZE:
+                            raise HTTPException(
+                                status_code=413,
+                                detail=f"File too large: {file.filename}"
+                            )
+                        hasher.update(chunk)
+                        await out.write(chunk)
+            except Exception:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                raise
+
+            # Identical bytes already indexed (or earlier in this batch):
+            # skip parsing entirely. The digest is only committed to
+            # _seen_digests once the batch actually indexes.
+            digest = hasher.hexdigest()
+            if digest in _seen_digests or digest in digests.values():
+                os.remove(file_path)
+                skipped_files.append(file.filename)
+                logger.info(f"Skipping duplicate upload {file.filename}")
                 continue
+            digests[file_path] = digest
+
+            file_paths.append(file_path)
+            logger.info(f"Saved file: {file.filename} ({file_size} bytes)")
+
+        if not file_paths:
+            return UploadResponse(
+                success=True,
+                message=f"All {len(skipped_files)} file(s) were duplicates of already-indexed content"
+            )
+
+        # Hand parsing/indexing to a background task so the client gets an
+        # upload_id immediately instead of waiting out the whole pipeline
+        upload_id = uuid.uuid4().hex
+        _upload_status[upload_id] = {
+            'status': 'processing',
+            'total_files': len(file_paths),
+            'processed_files': [],
+            'errors': []
+        }
+        while len(_upload_status) > _UPLOAD_STATUS_MAX:
+            _upload_status.popitem(last=False)
+        _spawn_task(_ingest_batch(upload_id, file_paths, digests))
 
         return UploadResponse(
             success=True,
-            processed_files=processed_files,
-            message=f"Successfully processed {len(processed_files)} file(s)"
+            upload_id=upload_id,
+            message=f"Accepted {len(file_paths)} file(s) for processing"
+                    + (f", skipped {len(skipped_files)} duplicate(s)" if skipped_files else "")
         )
 
     except Exception as e:
@@ -175,6 +456,66 @@ async def upload_documents(files: List[UploadFile] = File(...)):
             error=str(e)
         )
 
+async def _ingest_batch(upload_id: str, file_paths: List[str], digests: Dict[str, str]):
+    """Parse and index a saved upload batch, updating its status entry"""
+    status: Dict[str, Any] = {'status': 'processing', 'processed_files': [], 'errors': []}
+    try:
+        # The status entry can age out of the bounded map under heavy
+        # upload churn; fall back to a detached dict so ingestion itself
+        # still completes (pollers will just see a 404)
+        status = _upload_status.get(upload_id, status)
+        # Parse documents concurrently (parsing is independent per file),
+        # bounded so parallel upload requests share the pool fairly
+        results = await asyncio.gather(
+            *[_ingest_one(fp) for fp in file_paths],
+            return_exceptions=True
+        )
+        documents = []
+        parsed_paths = []
+        for file_path, result in zip(file_paths, results):
+            filename = os.path.basename(file_path)
+            if isinstance(result, Exception):
+                logger.error(f"Error processing {file_path}: {str(result)}")
+                status['errors'].append(f"{filename}: {str(result)}")
+                continue
+            documents.append(result)
+            parsed_paths.append(file_path)
+            status['processed_files'].append(filename)
+
+        # One bulk index call for the whole batch: a single embedding
+        # round trip and a single Chroma add
+        if documents:
+            await asyncio.to_thread(vector_store.add_documents_bulk, documents)
+            logger.info(f"Indexed {len(documents)} document(s) in one batch")
+
+            # Only now is the content actually in the index; committing the
+            # digests earlier would make a failed ingest swallow retries
+            for file_path in parsed_paths:
+                digest = digests.get(file_path)
+                if digest is not None:
+                    _seen_digests[digest] = os.path.basename(file_path)
+
+            # New documents can change any answer: retire cached ones
+            global _index_generation
+            _index_generation += 1
+            _ANSWER_CACHE.clear()
+
+        status['status'] = 'completed' if not status['errors'] else (
+            'completed_with_errors' if documents else 'failed'
+        )
+    except Exception as e:
+        logger.error(f"Ingestion error for upload {upload_id}: {str(e)}", exc_info=True)
+        status['status'] = 'failed'
+        status['errors'].append(str(e))
+
+@app.get("/upload/status/{upload_id}")
+def upload_status(upload_id: str):
+    """Poll the progress of a background upload"""
+    status = _upload_status.get(upload_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Unknown upload_id: {upload_id}")
+    return {"upload_id": upload_id, **status}
+
 @app.post("/ask", response_model=QuestionResponse)
 async def ask_question(request: QuestionRequest):
     """Ask a question based on uploaded documents"""
@@ -184,9 +525,37 @@ async def ask_question(request: QuestionRequest):
         if not request.question.strip():
             raise HTTPException(status_code=400, detail="Question cannot be empty")
 
-        # Retrieve relevant documents
-        results = vector_store.similarity_search(request.question, top_k=5)
-        
+        # Check the answer cache before doing any retrieval/LLM work
+        session = await asyncio.to_thread(conversation_store.get, request.session_id)
+        summary = session['summary']
+        recent = session['recent']
+        cache_key = _answer_cache_key(request.question, request.session_id, summary, len(recent))
+        cached = _ANSWER_CACHE.get(cache_key)
+        if cached is not None:
+            _ANSWER_CACHE.move_to_end(cache_key)
+            _answer_cache_stats['exact_hits'] += 1
+            logger.info("Answer cache hit")
+            await _record_turn(request.session_id, request.question, cached['answer'])
+            return QuestionResponse(success=True, **cached)
+
+        # Semantic tier: paraphrased repeats hit on embedding similarity.
+        # The same embedding is then passed into similarity_search, so a
+        # miss costs nothing extra.
+        question_vec = await asyncio.to_thread(vector_store.embed_query, request.question)
+        semantic_hit = _semantic_answer_get(
+            question_vec, request.session_id, summary, len(recent)
+        )
+        if semantic_hit is not None:
+            _answer_cache_stats['semantic_hits'] += 1
+            await _record_turn(request.session_id, request.question, semantic_hit['answer'])
+            return QuestionResponse(success=True, **semantic_hit)
+        _answer_cache_stats['misses'] += 1
+
+        # Retrieve relevant documents off the event loop
+        results = await asyncio.to_thread(
+            vector_store.similarity_search, request.question, 5, question_vec
+        )
+
         if not results:
             return QuestionResponse(
                 success=True,
@@ -195,46 +564,46 @@ async def ask_question(request: QuestionRequest):
                 confidence=0.0
             )
 
-        # Prepare context
+        # Prepare context (dedupe near-identical chunks, cap prompt size);
+        # sources below are extracted from the same surviving chunks
+        results = _select_context_chunks(results)
         context = "\n\n".join([r['content'] for r in results])
-        
-        # Get conversation history
-        history = conversation_history.get(request.session_id, [])
-        
+
+        # Fast path: never pay a Gemini round trip for blank context
+        if not context.strip():
+            return QuestionResponse(
+                success=True,
+                answer="I don't have enough information to answer that question. Please upload relevant documents first.",
+                sources=[],
+                confidence=0.0
+            )
+
         # Create prompt
-        prompt = create_prompt(request.question, context, history)
+        prompt = create_prompt(request.question, context, summary, recent)
         
-        # Generate answer
-        response = gemini_model.generate_content(prompt)
-        answer = response.text
-        
-        # Extract sources
-        sources = []
-        for result in results:
-            metadata = result.get('metadata', {})
-            file_path = metadata.get('file_path', 'Unknown')
-            filename = os.path.basename(file_path)
-            file_type = metadata.get('file_type', 'Unknown')
-            source = f"{filename} ({file_type})"
-            if source not in sources:
-                sources.append(source)
-        
-        # Calculate confidence
+        # Extract sources and compute the confidence heuristic (both are
+        # microseconds of synchronous work, not worth overlapping)
+        sources = _extract_sources(results)
         confidence = min(0.9, len(context) / 2000)
-        
+
+        async with async_timeout.timeout(config.LLM_TIMEOUT):
+            response = await gemini_model.generate_content_async(prompt)
+        answer = response.text
+
+        # Cache the answer for identical and paraphrased follow-up questions
+        payload = {
+            'answer': answer,
+            'sources': sources,
+            'confidence': confidence
+        }
+        _ANSWER_CACHE[cache_key] = payload
+        if len(_ANSWER_CACHE) > _ANSWER_CACHE_MAX:
+            _ANSWER_CACHE.popitem(last=False)
+        _semantic_answer_put(question_vec, request.session_id, summary, len(recent), payload)
+
         # Update conversation history
-        if request.session_id not in conversation_history:
-            conversation_history[request.session_id] = []
-        
-        conversation_history[request.session_id].append({
-            'user': request.question,
-            'assistant': answer
-        })
-        
-        # Keep only last 10 turns
-        if len(conversation_history[request.session_id]) > 10:
-            conversation_history[request.session_id] = conversation_history[request.session_id][-10:]
-        
+        await _record_turn(request.session_id, request.question, answer)
+
         return QuestionResponse(
             success=True,
             answer=answer,
@@ -249,38 +618,148 @@ async def ask_question(request: QuestionRequest):
             error=str(e)
         )
 
+def _sse(data: Dict[str, Any]) -> str:
+    """Encode one server-sent event"""
+    return f"data: {json.dumps(data)}\n\n"
+
+# Cached answers are replayed in slices this big so streaming clients
+# render hits and misses the same way
+_REPLAY_CHUNK_CHARS = 64
+
+async def _replay_cached_answer(payload: Dict[str, Any]):
+    """Stream a cached answer as if it were being generated"""
+    answer = payload['answer']
+    for i in range(0, len(answer), _REPLAY_CHUNK_CHARS):
+        yield _sse({'delta': answer[i:i + _REPLAY_CHUNK_CHARS]})
+    yield _sse({'done': True, 'sources': payload['sources'], 'confidence': payload['confidence']})
+
+@app.post("/ask/stream")
+async def ask_question_stream(request: QuestionRequest):
+    """Ask a question and stream the answer as server-sent events
+
+    Tokens reach the client as Gemini emits them, so perceived latency is
+    the time to first token instead of the full generation. Cache hits are
+    replayed in small slices so clients handle both paths identically.
+    """
+    logger.info(f"Received streaming question: {request.question}")
+
+    if not request.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+
+    session = await asyncio.to_thread(conversation_store.get, request.session_id)
+    summary = session['summary']
+    recent = session['recent']
+    cache_key = _answer_cache_key(request.question, request.session_id, summary, len(recent))
+    cached = _ANSWER_CACHE.get(cache_key)
+    if cached is not None:
+        _ANSWER_CACHE.move_to_end(cache_key)
+        _answer_cache_stats['exact_hits'] += 1
+        await _record_turn(request.session_id, request.question, cached['answer'])
+        return StreamingResponse(_replay_cached_answer(cached), media_type="text/event-stream")
+
+    question_vec = await asyncio.to_thread(vector_store.embed_query, request.question)
+    semantic_hit = _semantic_answer_get(question_vec, request.session_id, summary, len(recent))
+    if semantic_hit is not None:
+        _answer_cache_stats['semantic_hits'] += 1
+        await _record_turn(request.session_id, request.question, semantic_hit['answer'])
+        return StreamingResponse(_replay_cached_answer(semantic_hit), media_type="text/event-stream")
+    _answer_cache_stats['misses'] += 1
+
+    results = await asyncio.to_thread(
+        vector_store.similarity_search, request.question, 5, question_vec
+    )
+    results = _select_context_chunks(results)
+    context = "\n\n".join([r['content'] for r in results])
+    if not context.strip():
+        no_info = {
+            'answer': ("I don't have enough information to answer that question. "
+                       "Please upload relevant documents first."),
+            'sources': [],
+            'confidence': 0.0
+        }
+        return StreamingResponse(_replay_cached_answer(no_info), media_type="text/event-stream")
+
+    prompt = create_prompt(request.question, context, summary, recent)
+    sources = _extract_sources(results)
+    confidence = min(0.9, len(context) / 2000)
+
+    async def generate():
+        parts = []
+        try:
+            stream = await gemini_model.generate_content_async(prompt, stream=True)
+            async for chunk in stream:
+                if chunk.text:
+                    parts.append(chunk.text)
+                    yield _sse({'delta': chunk.text})
+
+            answer = "".join(parts)
+            payload = {'answer': answer, 'sources': sources, 'confidence': confidence}
+            _ANSWER_CACHE[cache_key] = payload
+            if len(_ANSWER_CACHE) > _ANSWER_CACHE_MAX:
+                _ANSWER_CACHE.popitem(last=False)
+            _semantic_answer_put(question_vec, request.session_id, summary, len(recent), payload)
+            await _record_turn(request.session_id, request.question, answer)
+
+            yield _sse({'done': True, 'sources': sources, 'confidence': confidence})
+        except Exception as e:
+            logger.error(f"Streaming generation error: {str(e)}", exc_info=True)
+            yield _sse({'error': str(e)})
+
+    return StreamingResponse(generate(), media_type="text/event-stream")
+
+async def _record_turn(session_id: str, question: str, answer: str):
+    """Append a turn to a session; fold evicted turns into the summary"""
+    evicted = await asyncio.to_thread(conversation_store.append_turn, session_id, question, answer)
+    if evicted is not None:
+        # Summarize off the critical path; the next prompt uses whatever
+        # summary is current when it is built
+        _spawn_task(_summarize_evicted_turn(session_id, evicted))
+
+async def _summarize_evicted_turn(session_id: str, turn: Dict[str, str]):
+    """Fold an evicted turn into the session's running summary"""
+    current_summary = (await asyncio.to_thread(conversation_store.get, session_id))['summary']
+    try:
+        prompt = (
+            "Update this running conversation summary with the new exchange. "
+            f"Keep it factual and under {_SUMMARY_MAX_CHARS} characters.\n\n"
+            f"Current summary:\n{current_summary or '(empty)'}\n\n"
+            f"New exchange:\nUser: {turn.get('user', '')}\n"
+            f"Assistant: {turn.get('assistant', '')}\n\nUpdated summary:"
+        )
+        response = await gemini_model.generate_content_async(prompt)
+        await asyncio.to_thread(
+            conversation_store.set_summary, session_id,
+            response.text.strip()[:_SUMMARY_MAX_CHARS]
+        )
+    except Exception as e:
+        logger.warning(f"History summarization failed for {session_id}: {str(e)}")
+        # Fall back to verbatim concatenation, trimmed to the cap
+        appended = f"{current_summary}\nUser: {turn.get('user', '')}\nAssistant: {turn.get('assistant', '')}"
+        await asyncio.to_thread(conversation_store.set_summary, session_id, appended[-_SUMMARY_MAX_CHARS:])
+
 @app.get("/conversation/{session_id}")
 def get_conversation_history(session_id: str):
     """Get conversation history for a session"""
+    session = conversation_store.get(session_id)
     return {
         "session_id": session_id,
-        "history": conversation_history.get(session_id, [])
+        "summary": session['summary'],
+        "history": session['recent']
     }
 
 @app.delete("/conversation/{session_id}")
 def clear_conversation_history(session_id: str):
     """Clear conversation history for a session"""
-    if session_id in conversation_history:
-        del conversation_history[session_id]
+    conversation_store.delete(session_id)
     return {"message": f"Conversation history cleared for {session_id}"}
 
-def create_prompt(query: str, context: str, history: List[Dict[str, str]]) -> str:
-    """Create a prompt for Gemini"""
-    history_text = ""
-    if history:
-        history_text = "\n\nPrevious Conversation:\n"
-        for turn in history[-3:]:
-            history_text += f"User: {turn.get('user', '')}\n"
-            history_text += f"Assistant: {turn.get('assistant', '')}\n"
-    
-    prompt = f"""You are a helpful AI assistant that answers questions based on provided document context.
+# Static prompt skeleton, built once at import time
+_PROMPT_PREFIX = """You are a helpful AI assistant that answers questions based on provided document context.
 
 CONTEXT FROM DOCUMENTS:
-{context}
+"""
 
-{history_text}
-
-CURRENT QUESTION: {query}
+_PROMPT_RULES = """
 
 Please provide a comprehensive answer based on the context provided. If the context doesn't contain enough information to fully answer the question, clearly state what information is missing. Always cite which parts of the context you're using to support your answer.
 
@@ -292,8 +771,21 @@ Rules:
 5. Maintain a helpful and professional tone
 
 Answer:"""
-    
-    return prompt
+
+def create_prompt(query: str, context: str, summary: str, recent: List[Dict[str, str]]) -> str:
+    """Create a prompt for Gemini"""
+    parts = [_PROMPT_PREFIX, context]
+    if summary:
+        parts.append(f"\n\nConversation Summary:\n{summary}\n")
+    if recent:
+        parts.append("\n\nPrevious Conversation:\n")
+        parts.append("".join(
+            f"User: {turn.get('user', '')}\nAssistant: {turn.get('assistant', '')}\n"
+            for turn in recent
+        ))
+    parts.append(f"\n\nCURRENT QUESTION: {query}")
+    parts.append(_PROMPT_RULES)
+    return "".join(parts)
 
 if __name__ == "__main__":
     import uvicorn
@@ -2,19 +2,84 @@ from urllib import response
 import chromadb
 from chromadb.config import Settings
 import cohere
-from typing import List, Dict, Any
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import List, Dict, Any, Optional
+import hashlib
 import logging
+import re
+import threading
 import uuid
 import shutil
 import os
 import time
 
+from embedding_cache import EmbeddingCache
+
 logger = logging.getLogger(__name__)
 
+# Up to this many vectors, a brute-force numpy scan beats HNSW traversal
+_FLAT_SEARCH_MAX = 10_000
+
+# Cohere's embed endpoint rejects requests with more than 96 texts
+_MAX_COHERE_BATCH = 96
+
+# Defensive per-text cap before embedding (~2k tokens). truncate="END"
+# already prevents server-side rejections; this just stops pathological
+# texts from bloating request payloads
+_MAX_CHARS_PER_TEXT = 8192
+
+# Word boundaries for chunking; spans let chunks be sliced straight out
+# of the original text without rebuilding strings
+_WORD_RE = re.compile(r"\S+")
+
+@lru_cache(maxsize=1)
+def _chunk_encoder():
+    """Lazy tokenizer for token-based chunking; None if tiktoken is missing"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logging.getLogger(__name__).warning(
+            f"tiktoken unavailable, chunking by words: {str(e)}"
+        )
+        return None
+
+# Rerank stage: overfetch this many ANN candidates per requested result,
+# then let the cross-encoder pick the final top_k
+_RERANK_MODEL = "rerank-english-v3.0"
+_RERANK_OVERFETCH = 5
+
+def _hnsw_params(vector_count: int) -> Dict[str, int]:
+    """HNSW build/search parameters tuned for the expected collection size"""
+    if vector_count < 100_000:
+        return {"hnsw:M": 16, "hnsw:construction_ef": 64, "hnsw:search_ef": 100}
+    if vector_count < 1_000_000:
+        return {"hnsw:M": 24, "hnsw:construction_ef": 128, "hnsw:search_ef": 100}
+    return {"hnsw:M": 32, "hnsw:construction_ef": 200, "hnsw:search_ef": 100}
+
+def _collection_metadata(expected_count: int = 100_000) -> Dict[str, Any]:
+    """Metadata for new collections: inner-product space + tuned HNSW parameters
+
+    Vectors are unit-normalized before insert/query, so inner product equals
+    cosine similarity at half the per-comparison cost (no norms, no sqrt).
+    """
+    return {"hnsw:space": "ip", **_hnsw_params(expected_count)}
+
+def _normalize(vectors: List[List[float]]) -> np.ndarray:
+    """L2-normalize embeddings to unit length as float32"""
+    arr = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(arr, axis=1, keepdims=True) + 1e-12
+    return arr / norms
+
 class VectorStore:
     """Handle vector storage and retrieval with ChromaDB"""
     
-    def __init__(self, persist_directory: str, collection_name: str, embedding_model: str):
+    def __init__(self, persist_directory: str, collection_name: str, embedding_model: str,
+                 embedding_cache_path: str = "/tmp/embedding_cache.db",
+                 embed_workers: int = 8):
         self.logger = logging.getLogger(__name__)
 
         # Use /tmp if persist_directory is not writable (Render only allows /tmp)
@@ -23,9 +88,27 @@ class VectorStore:
 
         self.collection_name = collection_name
 
-        # Initialize embedding model
+        # Initialize embedding model. Reuse one pooled HTTP client across
+        # all Cohere calls so keep-alive connections skip TCP+TLS setup,
+        # which otherwise dominates small requests.
         self.logger.info(f"Loading embedding model: {embedding_model}")
-        self.cohere_client = cohere.Client(os.getenv("COHERE_API_KEY"))
+        api_key = os.getenv("COHERE_API_KEY")
+        try:
+            import httpx
+            self._httpx_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=embed_workers + 4,
+                    max_keepalive_connections=embed_workers
+                ),
+                timeout=60.0
+            )
+            self.cohere_client = cohere.Client(api_key, httpx_client=self._httpx_client)
+        except (ImportError, TypeError) as e:
+            # Older cohere SDKs don't accept httpx_client; their default
+            # session still pools connections, just with stock limits
+            self.logger.warning(f"Falling back to default Cohere HTTP client: {str(e)}")
+            self._httpx_client = None
+            self.cohere_client = cohere.Client(api_key)
         self.embedding_model = embedding_model  # Keep for logging only
 
         # Initialize ChromaDB client
@@ -34,6 +117,41 @@ class VectorStore:
         # Get or create collection
         self.collection = self._get_or_create_collection()
 
+        # Cached count, maintained on every add: collection.count() is a
+        # SQLite round trip and was being paid per query
+        self._collection_count = self.collection.count()
+
+        # Disk cache so re-ingesting unchanged content skips the embedding API
+        self.embedding_cache = EmbeddingCache(embedding_cache_path)
+
+        # Embedding batches are network-bound, so in-flight batches overlap
+        self._embed_pool = ThreadPoolExecutor(
+            max_workers=embed_workers, thread_name_prefix="embed"
+        )
+
+        # Semantic search cache: paraphrased repeat queries reuse prior
+        # results without another Chroma traversal
+        self._search_cache: List[Dict[str, Any]] = []
+        self._search_cache_max = 128
+        self._search_cache_ttl = 300  # seconds
+        self._search_cache_threshold = 0.95
+
+        # Exact-match LRU in front of the semantic tier: byte-identical
+        # repeat queries skip even the query-embedding call
+        self._exact_cache: "OrderedDict[bytes, List[Dict[str, Any]]]" = OrderedDict()
+        self._exact_cache_max = 2000
+        self._exact_cache_lock = threading.RLock()
+        self._cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        # Bumped on every invalidation; a search that started before an
+        # ingest finished must not write its pre-ingest results back
+        self._cache_generation = 0
+
+        # In-memory copy of the corpus (SoA) for the small-collection
+        # flat-scan fast path; only trusted while it mirrors the collection
+        self._flat_embeddings: Optional[np.ndarray] = None
+        self._flat_documents: List[str] = []
+        self._flat_metadatas: List[Dict[str, Any]] = []
+
     
     def _initialize_client(self):
         """Initialize ChromaDB client with error handling and a consistent writable path."""
@@ -75,7 +193,10 @@ class VectorStore:
 
             try:
                 # Try to create new without deleting the whole DB
-                collection = self.client.create_collection(self.collection_name)
+                collection = self.client.create_collection(
+                    self.collection_name,
+                    metadata=_collection_metadata()
+                )
                 logger.info("New ChromaDB collection created successfully.")
                 return collection
 
@@ -96,7 +217,10 @@ class VectorStore:
                         allow_reset=True
                     )
                 )
-                return self.client.create_collection(self.collection_name)
+                return self.client.create_collection(
+                    self.collection_name,
+                    metadata=_collection_metadata()
+                )
 
 
     def _create_collection(self):
@@ -104,7 +228,7 @@ class VectorStore:
         try:
             collection = self.client.create_collection(
                 name=self.collection_name,
-                metadata={"hnsw:space": "cosine"}
+                metadata=_collection_metadata()
             )
             logger.info(f"Created new collection: {self.collection_name}")
             return collection
@@ -117,149 +241,479 @@ class VectorStore:
             self.logger.warning(f"Refusing to delete non-temp path: {self.persist_directory}")
         else:
             self.logger.warning(f"Deleting incompatible ChromaDB data at: {self.persist_directory}")
-            import shutil, time
 
-            for attempt in range(3):
+            # Atomically move the old data aside (rename is instant even for
+            # large stores), then delete it in the background instead of
+            # blocking on rmtree with retry sleeps
+            if os.path.exists(self.persist_directory):
+                trash_path = f"{self.persist_directory}.old-{uuid.uuid4().hex[:8]}"
                 try:
+                    os.rename(self.persist_directory, trash_path)
+                    threading.Thread(
+                        target=shutil.rmtree,
+                        args=(trash_path,),
+                        kwargs={'ignore_errors': True},
+                        daemon=True
+                    ).start()
+                except OSError as e:
+                    self.logger.warning(f"Could not move ChromaDB data aside: {str(e)}")
                     shutil.rmtree(self.persist_directory, ignore_errors=True)
-                    time.sleep(0.5)
-                    if not os.path.exists(self.persist_directory):
-                        break
-                except Exception as e:
-                    self.logger.error(f"Attempt {attempt + 1}: ChromaDB file busy, retrying in 1s...")
-                    time.sleep(1)
-            else:
-                # 🚨 Instead of crashing, just log and continue
-                self.logger.warning(
-                    f"Skipping deletion — could not fully remove ChromaDB at {self.persist_directory}. "
-                    "It may be locked by another process."
-                )
 
             os.makedirs(self.persist_directory, exist_ok=True)
-            return self.client.create_collection(self.collection_name)
+            self._collection_count = 0
+            return self.client.create_collection(
+                self.collection_name,
+                metadata=_collection_metadata()
+            )
     
-    def chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
-        """Split text into overlapping chunks"""
-        words = text.split()
+    def chunk_text(self, text: str, chunk_size: int = 450, overlap: int = 80) -> List[str]:
+        """Split text into overlapping chunks of roughly chunk_size tokens
+
+        Token windows track what the embedding model actually sees:
+        embed-english-v3.0 truncates past 512 tokens, so word-count
+        chunks regularly lost their tails. Falls back to word-span
+        chunking when tiktoken is unavailable.
+        """
+        encoder = _chunk_encoder()
+        if encoder is None:
+            return self._chunk_by_words(text, chunk_size, overlap)
+
+        tokens = encoder.encode(text)
+        if not tokens:
+            return []
+
         chunks = []
-        
-        for i in range(0, len(words), chunk_size - overlap):
-            chunk = ' '.join(words[i:i + chunk_size])
-            if chunk.strip():
-                chunks.append(chunk)
-        
+        for i in range(0, len(tokens), chunk_size - overlap):
+            chunks.append(encoder.decode(tokens[i:i + chunk_size]))
+        return chunks
+
+    def _chunk_by_words(self, text: str, chunk_size: int, overlap: int) -> List[str]:
+        """Word-count chunking fallback
+
+        Chunks are sliced from the original text via word-boundary spans,
+        so the whole pass is O(N) instead of materializing a word list and
+        re-joining every window.
+        """
+        spans = [match.span() for match in _WORD_RE.finditer(text)]
+        if not spans:
+            return []
+
+        chunks = []
+        for i in range(0, len(spans), chunk_size - overlap):
+            window = spans[i:i + chunk_size]
+            chunks.append(text[window[0][0]:window[-1][1]])
+
         return chunks
     
+    def _prepare_document(self, document: Dict[str, Any]):
+        """Chunk a parsed document into (ids, texts, metadatas), or None if empty"""
+        content = document.get('content', '')
+        metadata = document.get('metadata', {})
+
+        if not content.strip():
+            logger.warning(f"Empty content for document: {metadata.get('file_path', 'unknown')}")
+            return None
+
+        # Split into chunks
+        chunks = self.chunk_text(content)
+
+        if not chunks:
+            logger.warning(f"No chunks created for document: {metadata.get('file_path', 'unknown')}")
+            return None
+
+        chunk_ids = []
+        chunk_texts = []
+        chunk_metadatas = []
+
+        # Deterministic IDs: the same file path and chunk index always map
+        # to the same ID, so re-ingesting a file can upsert in place
+        # instead of accumulating duplicate chunks
+        doc_namespace = uuid.uuid5(uuid.NAMESPACE_URL, str(metadata.get('file_path', '')))
+
+        # Stringify the shared fields once (ChromaDB requires str values);
+        # only chunk_index differs per chunk
+        base_metadata = {k: str(v) for k, v in metadata.items()}
+        base_metadata['chunk_count'] = str(len(chunks))
+
+        for i, chunk in enumerate(chunks):
+            chunk_id = str(uuid.uuid5(doc_namespace, str(i)))
+            chunk_metadata = {**base_metadata, 'chunk_index': str(i)}
+
+            chunk_ids.append(chunk_id)
+            chunk_texts.append(chunk)
+            chunk_metadatas.append(chunk_metadata)
+
+        return chunk_ids, chunk_texts, chunk_metadatas
+
     def add_document(self, document: Dict[str, Any]):
-        """Add a document to the vector store"""
+        """Add a single document to the vector store"""
+        self.add_documents_bulk([document])
+
+    def add_documents_bulk(self, documents: List[Dict[str, Any]]):
+        """Index several parsed documents with one embed call and one Chroma add
+
+        Batching across files amortizes the Cohere round trip and Chroma's
+        per-add transaction cost over the whole upload.
+        """
         try:
-            content = document.get('content', '')
-            metadata = document.get('metadata', {})
-            
-            if not content.strip():
-                logger.warning(f"Empty content for document: {metadata.get('file_path', 'unknown')}")
-                return
-            
-            # Split into chunks
-            chunks = self.chunk_text(content)
-            
-            if not chunks:
-                logger.warning(f"No chunks created for document: {metadata.get('file_path', 'unknown')}")
+            all_ids: List[str] = []
+            all_texts: List[str] = []
+            all_metadatas: List[Dict[str, str]] = []
+
+            for document in documents:
+                prepared = self._prepare_document(document)
+                if prepared is None:
+                    continue
+                chunk_ids, chunk_texts, chunk_metadatas = prepared
+                all_ids.extend(chunk_ids)
+                all_texts.extend(chunk_texts)
+                all_metadatas.extend(chunk_metadatas)
+
+            if not all_texts:
                 return
-            
-            chunk_ids = []
-            chunk_texts = []
-            chunk_embeddings = []
-            chunk_metadatas = []
-            
-            for i, chunk in enumerate(chunks):
-                chunk_id = str(uuid.uuid4())
-                chunk_metadata = {
-                    **metadata,
-                    'chunk_index': i,
-                    'chunk_count': len(chunks)
-                }
-                
-                # Convert metadata values to strings (ChromaDB requirement)
-                chunk_metadata = {k: str(v) for k, v in chunk_metadata.items()}
-                
-                # Generate embedding
-                response = self.cohere_client.embed(
-                    texts=[chunk],
-                    model="embed-english-v3.0",
-                    input_type="search_document"
-                )
-                embedding = response.embeddings[0]
-
-                chunk_ids.append(chunk_id)
-                chunk_texts.append(chunk)
-                chunk_embeddings.append(embedding)
-                chunk_metadatas.append(chunk_metadata)
-            
-            # Batch add to collection
-            self.collection.add(
-                documents=chunk_texts,
+
+            # Deterministic IDs make re-ingests detectable: drop chunks the
+            # collection already holds before paying for embeddings
+            try:
+                existing = set(self.collection.get(ids=all_ids, include=[])['ids'])
+            except Exception as e:
+                logger.warning(f"Existing-ID check failed, indexing all chunks: {str(e)}")
+                existing = set()
+            if existing:
+                keep = [i for i, chunk_id in enumerate(all_ids) if chunk_id not in existing]
+                logger.info(f"Skipping {len(all_ids) - len(keep)} already-indexed chunk(s)")
+                if not keep:
+                    return
+                all_ids = [all_ids[i] for i in keep]
+                all_texts = [all_texts[i] for i in keep]
+                all_metadatas = [all_metadatas[i] for i in keep]
+
+            # Keep embeddings as a float32 ndarray end to end; Chroma accepts
+            # arrays directly, and round-tripping through Python lists boxed
+            # every float and roughly tripled peak memory
+            chunk_embeddings = _normalize(self._embed_chunks(all_texts))
+
+            # Single batched upsert: idempotent if two ingests race on the
+            # same IDs, where add would raise
+            self.collection.upsert(
+                documents=all_texts,
                 embeddings=chunk_embeddings,
-                metadatas=chunk_metadatas,
-                ids=chunk_ids
+                metadatas=all_metadatas,
+                ids=all_ids
             )
-            
-            logger.info(f"Added {len(chunks)} chunks from {metadata.get('file_path', 'unknown')}")
-        
+
+            # Existing IDs were filtered out above, so every upserted row is new
+            self._collection_count += len(all_ids)
+
+            logger.info(f"Added {len(all_texts)} chunks from {len(documents)} document(s)")
+
+            # Mirror the batch into the flat-scan corpus copy
+            if self._flat_embeddings is None:
+                self._flat_embeddings = chunk_embeddings
+            else:
+                self._flat_embeddings = np.vstack([self._flat_embeddings, chunk_embeddings])
+            self._flat_documents.extend(all_texts)
+            self._flat_metadatas.extend(all_metadatas)
+
+            # New content can change what any query should retrieve
+            self._invalidate_search_cache()
+
         except Exception as e:
-            logger.error(f"Error adding document to vector store: {str(e)}")
+            logger.error(f"Error adding documents to vector store: {str(e)}")
             raise
+
+    def _search_cache_get(self, query_embedding: np.ndarray, top_k: int) -> Optional[List[Dict[str, Any]]]:
+        """Return cached results for a semantically similar query, if any"""
+        now = time.time()
+        self._search_cache = [
+            entry for entry in self._search_cache
+            if now - entry['time'] < self._search_cache_ttl
+        ]
+
+        best = None
+        for entry in self._search_cache:
+            if entry['top_k'] != top_k:
+                continue
+            similarity = float(np.dot(entry['embedding'], query_embedding))
+            if similarity >= self._search_cache_threshold and (best is None or similarity > best[0]):
+                best = (similarity, entry)
+
+        if best:
+            logger.info(f"Semantic search cache hit (similarity={best[0]:.3f})")
+            return best[1]['results']
+        return None
+
+    def _search_cache_put(self, query_embedding: np.ndarray, top_k: int, results: List[Dict[str, Any]]):
+        self._search_cache.append({
+            'embedding': query_embedding,
+            'top_k': top_k,
+            'results': results,
+            'time': time.time()
+        })
+        if len(self._search_cache) > self._search_cache_max:
+            self._search_cache.pop(0)
+
+    def _invalidate_search_cache(self):
+        self._cache_generation += 1
+        self._search_cache.clear()
+        with self._exact_cache_lock:
+            self._exact_cache.clear()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the retrieval caches"""
+        with self._exact_cache_lock:
+            stats = dict(self._cache_stats)
+            stats['exact_entries'] = len(self._exact_cache)
+        total = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / total, 3) if total else 0.0
+        stats['semantic_entries'] = len(self._search_cache)
+        return stats
     
-    def similarity_search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    def _embed_one_batch(self, batch: List[str], input_type: str) -> List[List[float]]:
+        response = self.cohere_client.embed(
+            texts=[text[:_MAX_CHARS_PER_TEXT] for text in batch],
+            model="embed-english-v3.0",
+            input_type=input_type,
+            truncate="END"
+        )
+        return response.embeddings
+
+    def _embed_batched(self, texts: List[str], input_type: str) -> List[List[float]]:
+        """Embed texts in provider-sized batches, preserving input order
+
+        Batches run in parallel on the embed pool: the calls are
+        network-bound, so total latency approaches that of one round trip
+        instead of scaling with batch count.
+        """
+        batches = [
+            texts[start:start + _MAX_COHERE_BATCH]
+            for start in range(0, len(texts), _MAX_COHERE_BATCH)
+        ]
+        if len(batches) == 1:
+            return self._embed_one_batch(batches[0], input_type)
+
+        embeddings: List[List[float]] = []
+        embed = partial(self._embed_one_batch, input_type=input_type)
+        for batch_embeddings in self._embed_pool.map(embed, batches):
+            embeddings.extend(batch_embeddings)
+        return embeddings
+
+    def _embed_chunks(self, chunk_texts: List[str]) -> List[List[float]]:
+        """Embed chunk texts, reusing disk-cached embeddings where possible"""
+        chunk_hashes = [
+            hashlib.blake2b(chunk.encode(), digest_size=16).hexdigest()
+            for chunk in chunk_texts
+        ]
+        cached = self.embedding_cache.get_many(chunk_hashes, self.embedding_model)
+        missing = [i for i, h in enumerate(chunk_hashes) if h not in cached]
+
+        if missing:
+            fresh = self._embed_batched(
+                [chunk_texts[i] for i in missing], "search_document"
+            )
+            new_items = {}
+            for i, embedding in zip(missing, fresh):
+                cached[chunk_hashes[i]] = embedding
+                new_items[chunk_hashes[i]] = embedding
+            self.embedding_cache.put_many(new_items, self.embedding_model)
+
+        if len(missing) < len(chunk_texts):
+            logger.info(
+                f"Embedding cache: {len(chunk_texts) - len(missing)}/{len(chunk_texts)} chunks reused"
+            )
+
+        return [cached[h] for h in chunk_hashes]
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embed a query and unit-normalize it (float32)
+
+        Exposed so callers that need the query vector anyway (e.g. the
+        semantic answer cache) can pass it back into similarity_search
+        instead of paying a second Cohere round trip. Repeat queries are
+        served from an LRU keyed on the query text.
+        """
+        return np.asarray(self._embed_query_cached(query), dtype=np.float32)
+
+    @lru_cache(maxsize=256)
+    def _embed_query_cached(self, query: str) -> tuple:
+        """One Cohere call per distinct query text; tuple so entries are immutable"""
+        response = self.cohere_client.embed(
+            texts=[query[:_MAX_CHARS_PER_TEXT]],
+            model="embed-english-v3.0",
+            input_type="search_query",
+            truncate="END"
+        )
+        query_vec = np.asarray(response.embeddings[0], dtype=np.float32)
+        query_vec /= np.linalg.norm(query_vec) + 1e-12
+        return tuple(query_vec.tolist())
+
+    def similarity_search(self, query: str, top_k: int = 5,
+                          query_embedding: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
         """Perform similarity search"""
         try:
+            # Exact-match cache: one dict hash vs. embedding + ANN traversal
+            exact_key = hashlib.blake2b(f"{query}|{top_k}".encode(), digest_size=16).digest()
+            with self._exact_cache_lock:
+                cached_exact = self._exact_cache.get(exact_key)
+                if cached_exact is not None:
+                    self._exact_cache.move_to_end(exact_key)
+                    self._cache_stats['hits'] += 1
+                    return cached_exact
+                self._cache_stats['misses'] += 1
+
+            # Snapshot the generation before touching the index; if an
+            # ingest invalidates the caches mid-search, these (pre-ingest)
+            # results are dropped instead of cached
+            generation = self._cache_generation
+
             # Check if collection is empty
-            count = self.collection.count()
+            count = self._collection_count
             if count == 0:
                 logger.warning("Collection is empty. No documents to search.")
                 return []
-            
-            # Generate query embedding
-            response = self.cohere_client.embed(
-                texts=[query],
-                model="embed-english-v3.0",
-                input_type="search_query"
-            )
-            query_embedding = response.embeddings[0]
 
-            # Adjust top_k if collection has fewer items
-            actual_top_k = min(top_k, count)
-            
-            # Search
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=actual_top_k,
-                include=['documents', 'metadatas', 'distances']
-            )
-            
-            # Format results
-            formatted_results = []
-            if results['documents'] and len(results['documents']) > 0:
-                for i in range(len(results['documents'][0])):
-                    formatted_results.append({
-                        'content': results['documents'][0][i],
-                        'metadata': results['metadatas'][0][i],
-                        'score': 1 - results['distances'][0][i]
-                    })
-            
+            # Generate query embedding (reuse the caller's if provided)
+            if query_embedding is not None:
+                query_vec = query_embedding
+            else:
+                query_vec = self.embed_query(query)
+
+            # Semantic cache check on the unit-normalized query embedding
+            cached_results = self._search_cache_get(query_vec, top_k)
+            if cached_results is not None:
+                return cached_results
+
+            # Overfetch candidates for the rerank stage, bounded by the corpus
+            actual_top_k = min(max(top_k * _RERANK_OVERFETCH, 25), count)
+
+            if (
+                self._flat_embeddings is not None
+                and self._flat_embeddings.shape[0] == count
+                and count <= _FLAT_SEARCH_MAX
+            ):
+                # Small corpus: one matvec + argpartition beats HNSW traversal
+                formatted_results = self._flat_search(query_vec, actual_top_k)
+            else:
+                # Search (normalized query against the unit-normalized index)
+                results = self.collection.query(
+                    query_embeddings=[query_vec],
+                    n_results=actual_top_k,
+                    include=['documents', 'metadatas', 'distances']
+                )
+
+                # Format results
+                formatted_results = []
+                if results['documents'] and len(results['documents']) > 0:
+                    for i in range(len(results['documents'][0])):
+                        formatted_results.append({
+                            'content': results['documents'][0][i],
+                            'metadata': results['metadatas'][0][i],
+                            'score': 1 - results['distances'][0][i]
+                        })
+
+            formatted_results = self._rerank(query, formatted_results, top_k)
+
             logger.info(f"Found {len(formatted_results)} relevant chunks for query")
+            if generation == self._cache_generation:
+                self._search_cache_put(query_vec, top_k, formatted_results)
+                with self._exact_cache_lock:
+                    # Re-check under the lock: the exact cache has no TTL,
+                    # so a stale fill here would outlive the next upload
+                    if generation == self._cache_generation:
+                        self._exact_cache[exact_key] = formatted_results
+                        if len(self._exact_cache) > self._exact_cache_max:
+                            self._exact_cache.popitem(last=False)
+                            self._cache_stats['evictions'] += 1
             return formatted_results
         
         except Exception as e:
             logger.error(f"Error performing similarity search: {str(e)}")
             return []
     
+    def _rerank(self, query: str, candidates: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+        """Rerank ANN candidates with Cohere's cross-encoder, keeping top_k
+
+        Bi-encoder retrieval is fast but lossy; a rerank pass over a small
+        overfetched candidate set recovers most of the lost precision. Falls
+        back to vector order if the rerank call fails.
+        """
+        if len(candidates) <= top_k:
+            return candidates
+        try:
+            reranked = self.cohere_client.rerank(
+                model=_RERANK_MODEL,
+                query=query,
+                documents=[c['content'] for c in candidates],
+                top_n=top_k
+            )
+            results = []
+            for r in reranked.results:
+                item = dict(candidates[r.index])
+                item['score'] = float(r.relevance_score)
+                results.append(item)
+            return results
+        except Exception as e:
+            logger.warning(f"Rerank failed, falling back to vector order: {str(e)}")
+            return candidates[:top_k]
+
+    def _flat_search(self, query_vec: np.ndarray, top_k: int) -> List[Dict[str, Any]]:
+        """Brute-force top-k over the in-memory corpus (unit vectors, dot = cosine)"""
+        scores = self._flat_embeddings @ query_vec
+        k = min(top_k, scores.shape[0])
+        idx = np.argpartition(-scores, k - 1)[:k]
+        idx = idx[np.argsort(-scores[idx])]
+        return [
+            {
+                'content': self._flat_documents[i],
+                'metadata': self._flat_metadatas[i],
+                'score': float(scores[i])
+            }
+            for i in idx
+        ]
+
+    def batch_similarity_search(self, queries: List[str], top_k: int = 5) -> List[List[Dict[str, Any]]]:
+        """Run several queries with one embed call and one Chroma query"""
+        try:
+            if not queries:
+                return []
+
+            count = self._collection_count
+            if count == 0:
+                logger.warning("Collection is empty. No documents to search.")
+                return [[] for _ in queries]
+
+            # One batched embed pass for all query embeddings
+            query_embeddings = self._embed_batched(queries, "search_query")
+
+            results = self.collection.query(
+                query_embeddings=_normalize(query_embeddings),
+                n_results=min(top_k, count),
+                include=['documents', 'metadatas', 'distances']
+            )
+
+            batched_results = []
+            for qi in range(len(queries)):
+                formatted_results = []
+                for i in range(len(results['documents'][qi])):
+                    formatted_results.append({
+                        'content': results['documents'][qi][i],
+                        'metadata': results['metadatas'][qi][i],
+                        'score': 1 - results['distances'][qi][i]
+                    })
+                batched_results.append(formatted_results)
+
+            logger.info(f"Batch search served {len(queries)} queries in one round trip")
+            return batched_results
+
+        except Exception as e:
+            logger.error(f"Error performing batch similarity search: {str(e)}")
+            return [[] for _ in queries]
+
     def get_collection_stats(self) -> Dict[str, Any]:
         """Get collection statistics"""
         try:
-            count = self.collection.count()
             return {
-                'total_chunks': count,
+                'total_chunks': self._collection_count,
                 'collection_name': self.collection_name
             }
         except Exception as e:
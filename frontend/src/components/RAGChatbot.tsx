@@ -41,6 +41,18 @@ const RAGChatbot: React.FC = () => {
     scrollToBottom();
   }, [messages]);
 
+  const pollUploadStatus = async (uploadId: string) => {
+    // The backend indexes in the background; poll until it finishes
+    // (bounded at ~2 minutes, matching the old synchronous timeout)
+    for (let attempt = 0; attempt < 80; attempt++) {
+      await new Promise(resolve => setTimeout(resolve, 1500));
+      const response = await fetch(`${API_BASE_URL}/upload/status/${uploadId}`);
+      const status = await response.json();
+      if (status.status !== 'processing') return status;
+    }
+    throw new Error('Timed out waiting for document processing');
+  };
+
   const handleFileUpload = async (files: FileList | null) => {
     if (!files || files.length === 0) return;
 
@@ -62,13 +74,39 @@ const RAGChatbot: React.FC = () => {
 
       const result = await response.json();
 
-      if (result.success) {
-        setUploadedFiles(prev => [...prev, ...result.processed_files]);
+      if (result.success && result.upload_id) {
+        const status = await pollUploadStatus(result.upload_id);
+        const processedFiles: string[] = status.processed_files || [];
+
+        if (processedFiles.length > 0) {
+          setUploadedFiles(prev => [...prev, ...processedFiles]);
+          setMessages(prev => [
+            ...prev,
+            {
+              type: 'system',
+              content: `✅ Successfully processed ${processedFiles.length} file(s): ${processedFiles.map((f: string) => f.split('/').pop()).join(', ')}`,
+              timestamp: new Date().toLocaleTimeString()
+            }
+          ]);
+        }
+
+        if (status.errors && status.errors.length > 0) {
+          setMessages(prev => [
+            ...prev,
+            {
+              type: 'error',
+              content: `❌ Processing failed for: ${status.errors.join('; ')}`,
+              timestamp: new Date().toLocaleTimeString()
+            }
+          ]);
+        }
+      } else if (result.success) {
+        // No upload_id: nothing was queued (e.g. all files were duplicates)
         setMessages(prev => [
           ...prev,
           {
             type: 'system',
-            content: `✅ Successfully processed ${result.processed_files.length} file(s): ${result.processed_files.map((f: string) => f.split('/').pop()).join(', ')}`,
+            content: `✅ ${result.message}`,
             timestamp: new Date().toLocaleTimeString()
           }
         ]);